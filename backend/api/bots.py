@@ -0,0 +1,353 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Set
+import chess
+import chess.engine
+from .rate_limiter import SHED_ERROR, THROTTLE_ERROR
+
+"""
+Server-side Bot Players
+Picks moves for computer opponents without blocking the event loop. Bot turns
+are queued and served in arrival order by a fixed number of workers, and every
+move is bounded by its level's think-time budget, so thousands of concurrent
+bot games share the available cores fairly. UCI engine turns are served by
+separate workers so they cannot starve built-in searches.
+"""
+
+ENGINE_PATH = 'stockfish'
+ENGINE_POOL_SIZE = 2  # UCI engine processes shared by all 'engine' level games
+ENGINE_GRACE = 2.0  # seconds an engine may overrun its think time before it is replaced
+ENGINE_FALLBACK = 'hard'  # built-in level used when no UCI engine is available
+
+# Move rejections worth retrying: the server was overloaded, not the move wrong
+RETRYABLE_ERRORS = {SHED_ERROR, THROTTLE_ERROR}
+
+
+class BotLevel(NamedTuple):
+    """Strength settings of a bot level."""
+    depth: int  # maximum search depth of the built-in searcher
+    think_time: float  # seconds allowed per move
+    elo: int  # rating shown for the bot account
+    uci: bool = False  # use the pooled UCI engine instead of the built-in searcher
+
+
+LEVELS: Dict[str, BotLevel] = {
+    'easy': BotLevel(depth=1, think_time=0.1, elo=800),
+    'medium': BotLevel(depth=2, think_time=0.3, elo=1200),
+    'hard': BotLevel(depth=4, think_time=1.0, elo=1600),
+    'engine': BotLevel(depth=0, think_time=1.0, elo=2400, uci=True),
+}
+
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0,
+}
+MATE_SCORE = 100000
+
+# Small bonus for pieces and pawns near the centre
+CENTRE = chess.BB_D4 | chess.BB_E4 | chess.BB_D5 | chess.BB_E5
+EXTENDED_CENTRE = chess.BB_C3 | chess.BB_D3 | chess.BB_E3 | chess.BB_F3 | \
+    chess.BB_C4 | chess.BB_F4 | chess.BB_C5 | chess.BB_F5 | \
+    chess.BB_C6 | chess.BB_D6 | chess.BB_E6 | chess.BB_F6
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the think-time budget is spent."""
+
+
+def evaluate(board: chess.Board) -> int:
+    """
+    Static evaluation from the side to move's point of view.
+
+    Args:
+        board: Position to evaluate
+
+    Returns:
+        int: Score in centipawns
+    """
+    score = 0
+    for piece_type, value in PIECE_VALUES.items():
+        pieces = board.pieces_mask(piece_type, chess.WHITE), board.pieces_mask(piece_type, chess.BLACK)
+        score += value * (chess.popcount(pieces[0]) - chess.popcount(pieces[1]))
+        if piece_type != chess.KING:
+            score += 15 * (chess.popcount(pieces[0] & CENTRE) - chess.popcount(pieces[1] & CENTRE))
+            score += 5 * (chess.popcount(pieces[0] & EXTENDED_CENTRE) - chess.popcount(pieces[1] & EXTENDED_CENTRE))
+    return score if board.turn == chess.WHITE else -score
+
+
+def ordered_moves(board: chess.Board) -> List[chess.Move]:
+    """Order moves so that promotions and valuable captures are searched first."""
+    def priority(move: chess.Move) -> int:
+        score = PIECE_VALUES[move.promotion] if move.promotion else 0
+        if board.is_capture(move):
+            victim = board.piece_type_at(move.to_square) or chess.PAWN
+            score += 10 * PIECE_VALUES[victim] - PIECE_VALUES[board.piece_type_at(move.from_square)]
+        return score
+    return sorted(board.legal_moves, key=priority, reverse=True)
+
+
+def negamax(board: chess.Board, depth: int, alpha: int, beta: int, deadline: float) -> int:
+    """Alpha-beta search returning the score of the position for the side to move."""
+    if time.monotonic() > deadline:
+        raise SearchTimeout()
+    if board.is_checkmate():
+        return -MATE_SCORE - depth
+    if board.is_stalemate() or board.is_insufficient_material():
+        return 0
+    if depth == 0:
+        return evaluate(board)
+
+    for move in ordered_moves(board):
+        board.push(move)
+        score = -negamax(board, depth - 1, -beta, -alpha, deadline)
+        board.pop()
+        if score >= beta:
+            return score
+        alpha = max(alpha, score)
+    return alpha
+
+
+def choose_move(fen: str, chess960: bool, depth: int, think_time: float) -> str | None:
+    """
+    Pick a move with the built-in searcher using iterative deepening.
+    Runs in a worker process; the best move of the deepest completed
+    iteration is returned when the think-time budget runs out.
+
+    Args:
+        fen: Position to move from
+        chess960: Whether the position uses Chess960 castling rules
+        depth: Maximum search depth
+        think_time: Seconds allowed for the move
+
+    Returns:
+        Move in UCI format, or None if there is no legal move
+    """
+    board = chess.Board(fen, chess960=chess960)
+    moves = ordered_moves(board)
+    if not moves:
+        return None
+
+    deadline = time.monotonic() + think_time
+    best = random.choice(moves)
+    for current_depth in range(1, depth + 1):
+        try:
+            alpha = -MATE_SCORE * 2
+            candidates = []
+            for move in moves:
+                board.push(move)
+                score = -negamax(board, current_depth - 1, -MATE_SCORE * 2, -alpha + 1, deadline)
+                board.pop()
+                if score > alpha:
+                    alpha = score
+                    candidates = [move]
+                elif score == alpha:
+                    candidates.append(move)
+        except SearchTimeout:
+            break
+        # Vary play between equally scored moves
+        best = random.choice(candidates)
+        # Search the previous best move first in the next iteration
+        moves.remove(best)
+        moves.insert(0, best)
+    return best.uci()
+
+
+class EnginePool:
+    """
+    Fixed-size pool of UCI engine processes driven through the asyncio API.
+    Engines that crash or time out are discarded and replaced on next use.
+    """
+
+    def __init__(self, path: str = ENGINE_PATH, size: int = ENGINE_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.started = 0
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.engines: List[chess.engine.Protocol] = []
+
+    async def _acquire(self) -> chess.engine.Protocol:
+        if self.idle.empty() and self.started < self.size:
+            self.started += 1
+            try:
+                _, engine = await chess.engine.popen_uci(self.path)
+            except Exception:
+                self.started -= 1
+                raise
+            self.engines.append(engine)
+            return engine
+        return await self.idle.get()
+
+    async def _discard(self, engine: chess.engine.Protocol):
+        """Drop an engine in an unknown state so that a fresh process replaces it."""
+        self.engines.remove(engine)
+        self.started -= 1
+        try:
+            await asyncio.wait_for(engine.quit(), ENGINE_GRACE)
+        except Exception:
+            pass
+
+    async def play(self, board: chess.Board, think_time: float) -> str | None:
+        """
+        Ask an engine from the pool for a move.
+
+        Args:
+            board: Position to move from
+            think_time: Seconds the engine may think
+
+        Returns:
+            Move in UCI format, or None if the engine found none
+        """
+        engine = await self._acquire()
+        try:
+            result = await asyncio.wait_for(
+                engine.play(board, chess.engine.Limit(time=think_time)),
+                think_time + ENGINE_GRACE
+            )
+        except BaseException:
+            await self._discard(engine)
+            raise
+        self.idle.put_nowait(engine)
+        return result.move.uci() if result.move else None
+
+    async def close(self):
+        """Quit all engine processes."""
+        for engine in self.engines:
+            try:
+                await engine.quit()
+            except chess.engine.EngineError:
+                pass
+        self.engines = []
+        self.started = 0
+
+
+class BotScheduler:
+    """
+    Queues bot turns and serves them in arrival order. Built-in searches are
+    served by one worker per process in the search pool; 'engine' level turns
+    have their own queue and one worker per UCI engine, so a backlog of engine
+    turns never holds up built-in searches.
+    """
+
+    def __init__(self,
+                 get_board: Callable[[str], chess.Board | None],
+                 is_bot_turn: Callable[[str, str], bool],
+                 submit_move: Callable[[str, str], Awaitable[Dict]],
+                 workers: int | None = None):
+        """
+        Initialize an idle scheduler.
+
+        Args:
+            get_board: Returns the live board of a game, or None once it has ended
+            is_bot_turn: Tells whether a bot seat of a game is the side to move
+            submit_move: Plays a move for a bot socket, returning the move result
+            workers: Number of concurrent built-in searches, defaults to one per
+                     CPU core except the core running the event loop
+        """
+        self.get_board = get_board
+        self.is_bot_turn = is_bot_turn
+        self.submit_move = submit_move
+        self.workers = workers or max(1, (os.cpu_count() or 1) - 1)
+        self.search_queue: asyncio.Queue = asyncio.Queue()
+        self.engine_queue: asyncio.Queue = asyncio.Queue()
+        self.pending: Set[str] = set()  # game ids with a queued or running turn
+        self.executor: ProcessPoolExecutor | None = None
+        self.engines = EnginePool()
+        self.tasks: List[asyncio.Task] = []
+        self.moves_played = 0
+
+    def start(self):
+        """Start the process pool and the worker coroutines."""
+        loop = asyncio.get_running_loop()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.tasks = [loop.create_task(self._worker(self.search_queue)) for _ in range(self.workers)]
+        self.tasks += [loop.create_task(self._worker(self.engine_queue)) for _ in range(self.engines.size)]
+
+    async def stop(self):
+        """Stop the workers and shut down the process and engine pools."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await self.engines.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def request_move(self, game_id: str, sid: str, level: str):
+        """
+        Queue a turn for a bot seated in a game. Ignored if one is already queued.
+
+        Args:
+            game_id: Game the bot plays in
+            sid: Pseudo socket ID of the bot seat
+            level: Bot level name from LEVELS
+        """
+        if game_id in self.pending:
+            return
+        self.pending.add(game_id)
+        queue = self.engine_queue if LEVELS[level].uci else self.search_queue
+        queue.put_nowait((game_id, sid, level, None))
+
+    async def _worker(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            # computed is the (fen, move) of a rejected submission to retry
+            game_id, sid, level, computed = await queue.get()
+            keep_pending = False
+            try:
+                board = self.get_board(game_id)
+                if board is None or board.is_game_over() or not self.is_bot_turn(game_id, sid):
+                    continue
+                fen = board.fen()
+                settings = LEVELS[level]
+
+                if computed is not None and computed[0] == fen:
+                    move = computed[1]
+                elif settings.uci:
+                    try:
+                        move = await self.engines.play(board.copy(), settings.think_time)
+                    except Exception as e:
+                        # Hand the turn to the built-in search instead
+                        print(f"UCI engine failed, using built-in search: {e!r}")
+                        keep_pending = True
+                        self.search_queue.put_nowait((game_id, sid, ENGINE_FALLBACK, None))
+                        continue
+                else:
+                    move = await loop.run_in_executor(
+                        self.executor, choose_move,
+                        fen, board.chess960, settings.depth, settings.think_time
+                    )
+
+                # Drop the move if the game ended or moved on while thinking
+                board = self.get_board(game_id)
+                if move is None or board is None or board.fen() != fen or not self.is_bot_turn(game_id, sid):
+                    continue
+                # The opponent may reply before submit_move returns, so the
+                # next turn of this game must be able to queue from here on
+                self.pending.discard(game_id)
+                keep_pending = True
+                result = await self.submit_move(sid, move)
+                if 'error' not in result:
+                    self.moves_played += 1
+                elif result['error'] in RETRYABLE_ERRORS:
+                    # The server shed or throttled the move; submit it again
+                    # later without searching while the server is overloaded,
+                    # unless a new request for this turn is already queued
+                    if game_id not in self.pending:
+                        self.pending.add(game_id)
+                        loop.call_later(settings.think_time, queue.put_nowait, (game_id, sid, level, (fen, move)))
+                else:
+                    print(f"Bot move {move} rejected in game {game_id}: {result['error']}")
+            except Exception as e:
+                print(f"Error in bot turn for game {game_id}: {e}")
+            finally:
+                if not keep_pending:
+                    self.pending.discard(game_id)
+                queue.task_done()
@@ -0,0 +1,244 @@
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Tuple
+import chess
+
+"""
+Game Event Log
+Append-only log of game events (join, move, end) with periodic compacted
+snapshots, used to restore in-flight games after the server process dies.
+
+Files in the log directory, for generation N:
+    snapshot-N.seg  boards of all active games when generation N started
+    events-N.log    events recorded since that snapshot
+"""
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'game_log')
+
+# Event kinds
+JOIN = 1
+MOVE = 2
+END = 3
+
+# Event record: kind, game_id, payload length, followed by the payload
+EVENT_HEADER = struct.Struct('<BIH')
+
+# Snapshot segment: header followed by one fixed-size record per board, so
+# the file can be mapped and decoded without parsing FEN strings
+SEGMENT_MAGIC = b'C360SEG1'
+SEGMENT_HEADER = struct.Struct('<8sII')  # magic, generation, game count
+SEGMENT_ENTRY = struct.Struct(
+    '<I'    # game_id
+    '10Q'   # pawns, knights, bishops, rooks, queens, kings, white, black, promoted, castling rights
+    'BBB'   # en passant square (NO_SQUARE if none), turn, flags
+    'II'    # halfmove clock, fullmove number
+)
+
+NO_SQUARE = 255
+FLAG_CHESS960 = 1
+
+
+class GameEventLog:
+    """
+    Writes game events to disk and restores active games from them.
+    """
+
+    def __init__(self, directory: str = LOG_DIR):
+        """
+        Initialize the log. Nothing is written until `recover` has run.
+
+        Args:
+            directory (str): Directory holding snapshots and event logs
+        """
+        self.directory = directory
+        self.generation = 0
+        self.events_since_snapshot = 0
+        self._file = None
+
+    def _path(self, prefix: str, generation: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{prefix}-{generation}.{suffix}")
+
+    def _generations(self, prefix: str, suffix: str) -> List[int]:
+        """List the generations that have a file with the given prefix."""
+        generations = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix + '-') and name.endswith('.' + suffix):
+                number = name[len(prefix) + 1:-len(suffix) - 1]
+                if number.isdigit():
+                    generations.append(int(number))
+        return sorted(generations)
+
+    def _append(self, kind: int, game_id: str, payload: bytes = b''):
+        if self._file is None:
+            return
+        self._file.write(EVENT_HEADER.pack(kind, int(game_id), len(payload)) + payload)
+        self.events_since_snapshot += 1
+
+    def record_join(self, game_id: str, board: chess.Board):
+        """Record a game being loaded into memory with its current position."""
+        flags = FLAG_CHESS960 if board.chess960 else 0
+        self._append(JOIN, game_id, bytes([flags]) + board.fen().encode())
+
+    def record_move(self, game_id: str, move: str):
+        """Record a move in UCI format."""
+        self._append(MOVE, game_id, move.encode())
+
+    def record_end(self, game_id: str):
+        """Record a game leaving memory (game over or abandoned)."""
+        self._append(END, game_id)
+
+    def recover(self) -> Dict[str, chess.Board]:
+        """
+        Restore all active games from the latest snapshot plus the log tail,
+        then open the log for appending.
+
+        Returns:
+            Dict mapping game_id to its restored board
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        started = time.perf_counter()
+
+        snapshots = self._generations('snapshot', 'seg')
+        self.generation = snapshots[-1] if snapshots else 0
+        boards = self._read_snapshot() if snapshots else {}
+        tail = self._read_events(boards)
+        games = {str(game_id): board for game_id, board in boards.items()}
+
+        self._file = open(self._path('events', self.generation, 'log'), 'ab', buffering=0)
+        self.events_since_snapshot = tail
+        print(f"Recovered {len(games)} games from generation {self.generation} "
+              f"({tail} logged events) in {time.perf_counter() - started:.3f}s")
+        return games
+
+    def _read_snapshot(self) -> Dict[int, chess.Board]:
+        """Decode the current generation's snapshot segment through mmap."""
+        boards: Dict[int, chess.Board] = {}
+        with open(self._path('snapshot', self.generation, 'seg'), 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, _, count = SEGMENT_HEADER.unpack_from(mm, 0)
+                if magic != SEGMENT_MAGIC:
+                    raise ValueError(f"Invalid snapshot segment for generation {self.generation}")
+                view = memoryview(mm)[SEGMENT_HEADER.size:SEGMENT_HEADER.size + count * SEGMENT_ENTRY.size]
+                try:
+                    for entry in SEGMENT_ENTRY.iter_unpack(view):
+                        boards[entry[0]] = unpack_board(entry)
+                finally:
+                    view.release()
+        return boards
+
+    def _read_events(self, boards: Dict[int, chess.Board]) -> int:
+        """
+        Replay the current generation's event log on top of the snapshot.
+        A record cut short by a crash is dropped and truncated from the file.
+
+        Returns:
+            int: Number of events replayed
+        """
+        path = self._path('events', self.generation, 'log')
+        if not os.path.exists(path):
+            return 0
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        count = 0
+        pos = 0
+        while pos + EVENT_HEADER.size <= len(data):
+            kind, game_id, length = EVENT_HEADER.unpack_from(data, pos)
+            end = pos + EVENT_HEADER.size + length
+            if end > len(data):
+                break
+            payload = data[pos + EVENT_HEADER.size:end]
+            if kind == JOIN:
+                boards[game_id] = chess.Board(payload[1:].decode(), chess960=bool(payload[0] & FLAG_CHESS960))
+            elif kind == MOVE and game_id in boards:
+                # Moves were validated before being logged
+                boards[game_id].push(chess.Move.from_uci(payload.decode()))
+            elif kind == END:
+                boards.pop(game_id, None)
+            count += 1
+            pos = end
+
+        if pos < len(data):
+            print(f"Dropping {len(data) - pos} bytes of incomplete event log")
+            with open(path, 'r+b') as f:
+                f.truncate(pos)
+        return count
+
+    def snapshot(self, games: Dict[str, chess.Board]):
+        """
+        Write all active boards to a new snapshot segment and start a new
+        event log generation, removing the files it supersedes.
+
+        Args:
+            games: Active boards keyed by game_id
+        """
+        generation = self.generation + 1
+        entries = [pack_board(int(game_id), board) for game_id, board in games.items()]
+
+        path = self._path('snapshot', generation, 'seg')
+        with open(path + '.tmp', 'wb') as f:
+            f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, generation, len(entries)))
+            f.write(b''.join(entries))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self._path('events', generation, 'log'), 'ab', buffering=0)
+        self.generation = generation
+        self.events_since_snapshot = 0
+
+        # Older generations are fully covered by the new snapshot
+        for old in self._generations('snapshot', 'seg'):
+            if old < generation:
+                os.remove(self._path('snapshot', old, 'seg'))
+        for old in self._generations('events', 'log'):
+            if old < generation:
+                os.remove(self._path('events', old, 'log'))
+
+    def close(self):
+        """Close the event log file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def pack_board(game_id: int, board: chess.Board) -> bytes:
+    """Encode a board as a fixed-size snapshot record."""
+    return SEGMENT_ENTRY.pack(
+        game_id,
+        board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+        board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK], board.promoted,
+        board.castling_rights,
+        NO_SQUARE if board.ep_square is None else board.ep_square,
+        int(board.turn),
+        FLAG_CHESS960 if board.chess960 else 0,
+        board.halfmove_clock, board.fullmove_number
+    )
+
+
+def unpack_board(entry: Tuple) -> chess.Board:
+    """Rebuild a board from a decoded snapshot record without parsing FEN."""
+    (_, pawns, knights, bishops, rooks, queens, kings, white, black, promoted,
+     castling_rights, ep_square, turn, flags, halfmove_clock, fullmove_number) = entry
+    board = chess.Board(None, chess960=bool(flags & FLAG_CHESS960))
+    board.pawns = pawns
+    board.knights = knights
+    board.bishops = bishops
+    board.rooks = rooks
+    board.queens = queens
+    board.kings = kings
+    board.promoted = promoted
+    board.occupied_co[chess.WHITE] = white
+    board.occupied_co[chess.BLACK] = black
+    board.occupied = white | black
+    board.castling_rights = castling_rights
+    board.ep_square = None if ep_square == NO_SQUARE else ep_square
+    board.turn = bool(turn)
+    board.halfmove_clock = halfmove_clock
+    board.fullmove_number = fullmove_number
+    return board
@@ -0,0 +1,280 @@
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Set, Tuple
+
+"""
+Friends and Presence Service
+Keeps the friendship graph in memory and derives online presence from live
+Socket.IO connections, so friend lists and statuses can be pushed to clients
+instead of being polled from the database.
+"""
+
+OFFLINE = 'offline'
+ONLINE = 'online'
+IN_GAME = 'in_game'
+
+
+class FriendIndex(NamedTuple):
+    """Friendship index built from a full read of the table."""
+    friends: Dict[int, Set[int]]  # user_id -> accepted friend ids
+    pending: Dict[int, Set[int]]  # receiver_id -> sender ids
+    edges: FrozenSet[int]  # encoded rows, compared between reloads to find changed users
+
+
+def encode_edge(user_id: int, friend_id: int, status: str) -> int:
+    """Pack a friendship row into a single int."""
+    return (user_id << 33) | (friend_id << 1) | (status == 'accepted')
+
+
+def build_index(rows: List[Tuple[int, int, str]]) -> FriendIndex:
+    """
+    Build the adjacency index of friendship rows. Touches no shared state, so
+    it can run in a worker thread while the event loop keeps serving events.
+
+    Args:
+        rows: (user_id, friend_id, status) tuples as stored in `friendships`
+
+    Returns:
+        FriendIndex: Accepted friendships in both directions, pending requests
+        by receiver, and the encoded rows
+    """
+    friends: Dict[int, Set[int]] = {}
+    pending: Dict[int, Set[int]] = {}
+    edges = set()
+    for user_id, friend_id, status in rows:
+        user_id, friend_id = int(user_id), int(friend_id)
+        if status == 'accepted':
+            friends.setdefault(user_id, set()).add(friend_id)
+            friends.setdefault(friend_id, set()).add(user_id)
+        else:
+            pending.setdefault(friend_id, set()).add(user_id)
+        edges.add(encode_edge(user_id, friend_id, status))
+    return FriendIndex(friends, pending, frozenset(edges))
+
+
+def changed_users(old_edges: FrozenSet[int], new_edges: FrozenSet[int]) -> Set[int]:
+    """Return the users on either side of rows that differ between two reads."""
+    users = set()
+    for edge in old_edges.symmetric_difference(new_edges):
+        users.add(edge >> 33)
+        users.add((edge >> 1) & 0xFFFFFFFF)
+    return users
+
+
+class FriendGraph:
+    """
+    In-memory adjacency index of the `friendships` table.
+    Accepted friendships are stored in both directions; pending requests are
+    indexed by receiver.
+    """
+
+    def __init__(self):
+        self.friends: Dict[int, Set[int]] = {}  # user_id -> accepted friend ids
+        self.pending: Dict[int, Set[int]] = {}  # receiver_id -> sender ids
+        self.usernames: Dict[int, str] = {}  # user_id -> username
+        self.edges: FrozenSet[int] = frozenset()  # encoded rows of the last full load
+        self.loaded = False
+        # Incremental updates made while a reload reads the table
+        self._journal: List[Tuple[Callable, Tuple]] | None = None
+
+    def begin_reload(self):
+        """
+        Start recording incremental updates, so that they can be replayed on
+        top of rows that were read before they happened.
+        """
+        self._journal = []
+
+    def abort_reload(self):
+        """Stop recording updates after a failed reload."""
+        self._journal = None
+
+    def _replay(self):
+        journal, self._journal = self._journal or [], None
+        for update, args in journal:
+            update(self, *args)
+
+    def load(self, index: FriendIndex, usernames: Dict[int, str]):
+        """
+        Swap in an index built by `build_index`, then replay the updates
+        recorded since `begin_reload`.
+
+        Args:
+            index: Index of a full read of the table
+            usernames: All known usernames, replacing the current ones
+        """
+        self.friends = index.friends
+        self.pending = index.pending
+        self.edges = index.edges
+        self.usernames = usernames
+        self.loaded = True
+        self._replay()
+
+    def apply(self, rows: List[Tuple[int, int, str]], usernames: Dict[int, str]) -> Set[int]:
+        """
+        Apply rows inserted or updated since the last sync, then replay the
+        updates recorded since `begin_reload`. Rows already reflected in the
+        index are skipped.
+
+        Args:
+            rows: (user_id, friend_id, status) tuples as stored in `friendships`
+            usernames: Usernames of the users appearing in `rows`
+
+        Returns:
+            Set of users whose friend list or requests changed
+        """
+        journal, self._journal = self._journal, None
+        changed = set()
+        for user_id, friend_id, status in rows:
+            user_id, friend_id = int(user_id), int(friend_id)
+            if status == 'accepted' and friend_id not in self.get_friends(user_id):
+                self.accept(user_id, friend_id)
+            elif status == 'pending' and self.status(user_id, friend_id) == 'none':
+                self.add_request(user_id, friend_id)
+            else:
+                continue
+            changed.update((user_id, friend_id))
+        self.usernames.update(usernames)
+        self._journal = journal
+        self._replay()
+        return changed
+
+    def add_user(self, user_id: int, username: str):
+        """Remember the name of a user."""
+        self._record(FriendGraph.add_user, user_id, username)
+        self.usernames[user_id] = username
+
+    def _record(self, update: Callable, *args):
+        if self._journal is not None:
+            self._journal.append((update, args))
+
+    def get_friends(self, user_id: int) -> Set[int]:
+        """Return the accepted friends of a user."""
+        return self.friends.get(user_id, set())
+
+    def get_requests(self, user_id: int) -> Set[int]:
+        """Return the senders of pending requests addressed to a user."""
+        return self.pending.get(user_id, set())
+
+    def status(self, user_id: int, target_id: int) -> str:
+        """
+        Friendship status between two users.
+
+        Returns:
+            'accepted', 'pending' or 'none'
+        """
+        if target_id in self.get_friends(user_id):
+            return 'accepted'
+        if target_id in self.get_requests(user_id) or user_id in self.get_requests(target_id):
+            return 'pending'
+        return 'none'
+
+    def add_request(self, sender_id: int, receiver_id: int):
+        """Record a new pending request."""
+        self._record(FriendGraph.add_request, sender_id, receiver_id)
+        self.pending.setdefault(receiver_id, set()).add(sender_id)
+
+    def accept(self, sender_id: int, receiver_id: int):
+        """Turn a pending request into an accepted friendship."""
+        self._record(FriendGraph.accept, sender_id, receiver_id)
+        self.get_requests(receiver_id).discard(sender_id)
+        self.friends.setdefault(sender_id, set()).add(receiver_id)
+        self.friends.setdefault(receiver_id, set()).add(sender_id)
+
+    def remove(self, user_id: int, other_id: int):
+        """Drop any friendship or pending request between two users."""
+        self._record(FriendGraph.remove, user_id, other_id)
+        self.get_requests(user_id).discard(other_id)
+        self.get_requests(other_id).discard(user_id)
+        self.get_friends(user_id).discard(other_id)
+        self.get_friends(other_id).discard(user_id)
+
+
+class PresenceTracker:
+    """
+    Maps users to their live sockets and derives their presence status.
+    """
+
+    def __init__(self, is_in_game: Callable[[str], bool]):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            is_in_game: Tells whether a socket is currently playing a game
+        """
+        self.is_in_game = is_in_game
+        self.user_sockets: Dict[int, Set[str]] = {}  # user_id -> socket ids
+        self.socket_users: Dict[str, int] = {}  # socket_id -> user_id
+
+    def add_socket(self, sid: str, user_id: int):
+        """
+        Associate a socket with a user. A user may have any number of
+        sockets, e.g. one per device or browser tab.
+
+        Args:
+            sid: Socket ID to register
+            user_id: User the socket was authenticated as
+        """
+        self.remove_socket(sid)
+        self.socket_users[sid] = user_id
+        self.user_sockets.setdefault(user_id, set()).add(sid)
+
+    def remove_socket(self, sid: str) -> int | None:
+        """
+        Forget a socket.
+
+        Returns:
+            The user the socket belonged to, or None if it was not registered
+        """
+        user_id = self.socket_users.pop(sid, None)
+        if user_id is not None:
+            sockets = self.user_sockets.get(user_id)
+            if sockets is not None:
+                sockets.discard(sid)
+                if not sockets:
+                    del self.user_sockets[user_id]
+        return user_id
+
+    def get_user(self, sid: str) -> int | None:
+        """Return the user registered on a socket."""
+        return self.socket_users.get(sid)
+
+    def status(self, user_id: int) -> str:
+        """Derive a user's presence from their live sockets."""
+        sockets = self.user_sockets.get(user_id)
+        if not sockets:
+            return OFFLINE
+        if any(self.is_in_game(sid) for sid in sockets):
+            return IN_GAME
+        return ONLINE
+
+    def online(self, user_ids: Set[int]) -> List[int]:
+        """Return the users of a set that have live sockets."""
+        return [user_id for user_id in user_ids if user_id in self.user_sockets]
+
+
+def user_room(user_id: int) -> str:
+    """Socket.IO room shared by all sockets of a user."""
+    return f"user_{user_id}"
+
+
+def friends_snapshot(graph: FriendGraph, tracker: PresenceTracker, user_id: int) -> Dict[str, Any]:
+    """
+    Build the friend list and pending requests of a user from memory.
+
+    Args:
+        graph: Friendship index
+        tracker: Live presence
+        user_id: User to describe
+
+    Returns:
+        Dict containing friends with their presence status and pending requests
+    """
+    return {
+        'friends': [{
+            'id': friend_id,
+            'username': graph.usernames.get(friend_id),
+            'status': tracker.status(friend_id)
+        } for friend_id in graph.get_friends(user_id)],
+        'requests': [{
+            'id': sender_id,
+            'username': graph.usernames.get(sender_id)
+        } for sender_id in graph.get_requests(user_id)]
+    }
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+"""
+Rate Limiting and Admission Control
+Bounds how often clients can trigger expensive Socket.IO events and sheds load
+when the server is already saturated.
+"""
+
+# Per-socket budget: sustained events per second and burst size
+SOCKET_RATE = 10.0
+SOCKET_BURST = 20
+
+# Per-game budget, shared by both players of a game
+GAME_RATE = 20.0
+GAME_BURST = 40
+
+# Load shedding thresholds
+MAX_LOOP_LAG = 0.25  # seconds of event-loop lag before shedding
+MAX_DB_BUSY = 0.5  # share of event-loop time spent blocked in database calls before shedding
+LAG_SAMPLE_INTERVAL = 0.1  # seconds between event-loop lag samples
+
+# Error replies for rejected events
+SHED_ERROR = 'Server busy, please retry'
+THROTTLE_ERROR = 'Rate limit exceeded'
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at a fixed rate up to a burst capacity.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum number of tokens held
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def consume(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens from the bucket if enough are available.
+
+        Args:
+            tokens (float): Number of tokens the event costs
+
+        Returns:
+            bool: True if the event is allowed, False if it must be throttled
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limits keyed by socket ID and by game ID.
+    """
+
+    def __init__(self):
+        self.socket_buckets: Dict[str, TokenBucket] = {}  # socket_id -> bucket
+        self.game_buckets: Dict[str, TokenBucket] = {}  # game_id -> bucket
+
+    def allow(self, sid: str, game_id: str | None = None) -> str | None:
+        """
+        Check an event against the socket and game budgets.
+
+        Args:
+            sid: Socket ID sending the event
+            game_id: Game the event targets, if known
+
+        Returns:
+            None if the event is allowed, otherwise 'socket' or 'game' naming
+            the budget that was exhausted
+        """
+        socket_bucket = self.socket_buckets.get(sid)
+        if socket_bucket is None:
+            socket_bucket = self.socket_buckets[sid] = TokenBucket(SOCKET_RATE, SOCKET_BURST)
+        if not socket_bucket.consume():
+            counters['throttled_socket'] += 1
+            return 'socket'
+
+        if game_id is not None:
+            game_bucket = self.game_buckets.get(game_id)
+            if game_bucket is None:
+                game_bucket = self.game_buckets[game_id] = TokenBucket(GAME_RATE, GAME_BURST)
+            if not game_bucket.consume():
+                counters['throttled_game'] += 1
+                return 'game'
+
+        return None
+
+    def forget_socket(self, sid: str):
+        """Drop the bucket of a disconnected socket."""
+        self.socket_buckets.pop(sid, None)
+
+    def forget_game(self, game_id: str):
+        """Drop the bucket of a finished or abandoned game."""
+        self.game_buckets.pop(game_id, None)
+
+
+class AdmissionController:
+    """
+    Global load shedding based on event-loop lag and time spent in database calls.
+    The MySQL driver is synchronous, so database calls block the event loop;
+    their share of wall time shows whether lag is caused by the database.
+    """
+
+    def __init__(self):
+        self.loop_lag: float = 0.0
+        self.db_busy: float = 0.0
+        self._db_time: float = 0.0
+        self._monitor: asyncio.Task | None = None
+
+    def start(self):
+        """Start the event-loop lag monitor if it is not already running."""
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.get_running_loop().create_task(self._measure_lag())
+
+    async def _measure_lag(self):
+        """
+        Sample how late the event loop wakes up compared to the requested sleep,
+        and which share of the sample window was spent in database calls.
+        """
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            elapsed = time.monotonic() - started
+            self.loop_lag = max(0.0, elapsed - LAG_SAMPLE_INTERVAL)
+            self.db_busy = min(1.0, self._db_time / elapsed)
+            self._db_time = 0.0
+
+    def admit(self) -> bool:
+        """
+        Decide whether a new expensive event may be processed.
+
+        Returns:
+            bool: True if the event is admitted, False if it is shed
+        """
+        if self.loop_lag > MAX_LOOP_LAG or self.db_busy > MAX_DB_BUSY:
+            counters['shed'] += 1
+            return False
+        counters['admitted'] += 1
+        return True
+
+    @contextmanager
+    def db_call(self):
+        """Measure the time spent in a blocking database call."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._db_time += time.monotonic() - started
+
+
+# Throttling and shedding counters
+counters: Dict[str, int] = {
+    'admitted': 0,
+    'shed': 0,
+    'throttled_socket': 0,
+    'throttled_game': 0,
+}
+
+rate_limiter = RateLimiter()
+admission = AdmissionController()
+
+
+def get_load_stats() -> Dict[str, float | int]:
+    """
+    Report current load indicators and rate limiting counters.
+
+    Returns:
+        Dict containing event-loop lag, database busy share and counters
+    """
+    return {
+        'loop_lag': admission.loop_lag,
+        'db_busy': admission.db_busy,
+        **counters,
+    }
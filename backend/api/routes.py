@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 from pydantic import BaseModel
 from ChessGame import ChessGame
+from .rate_limiter import get_load_stats
 import chess
 import random
 
@@ -35,6 +36,11 @@ async def chess_root() -> Dict[str, str]:
     """Root endpoint for chess API."""
     return {"message": "Welcome to Chess 360!"}
 
+@router.get("/server/load")
+async def get_server_load() -> Dict[str, Any]:
+    """Get event-loop lag, database busy share and throttling counters."""
+    return {"load": get_load_stats()}
+
 @router.get("/game")
 async def get_game() -> Dict[str, str]:
     """Game information endpoint."""
@@ -0,0 +1,42 @@
+import hashlib
+import hmac
+import os
+import time
+
+"""
+Session Tokens
+Verifies the signed session tokens issued by php/login.php, so that Socket.IO
+clients can prove which user they are logged in as.
+"""
+
+# Shared with the PHP endpoints; tokens are rejected while it is unset
+SESSION_SECRET = os.environ.get('CHESS360_SESSION_SECRET', '')
+
+
+def sign(payload: str, secret: str = SESSION_SECRET) -> str:
+    """Compute the signature of a token payload."""
+    return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def read_session_token(token: str, secret: str = SESSION_SECRET) -> int | None:
+    """
+    Check a session token and return the user it was issued to.
+
+    Args:
+        token: Token in the form "<user_id>.<expires>.<signature>"
+        secret: Secret the token was signed with
+
+    Returns:
+        The user ID, or None if the token is malformed, forged or expired
+    """
+    if not secret:
+        return None
+    parts = str(token).split('.')
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    user_id, expires, signature = parts
+    if not hmac.compare_digest(sign(f"{user_id}.{expires}", secret), signature):
+        return None
+    if int(expires) < time.time():
+        return None
+    return int(user_id)
@@ -1,7 +1,17 @@
+import asyncio
+import time
 import socketio
-from typing import Dict, Any, cast
+from datetime import datetime, timedelta
+from typing import Dict, Any, FrozenSet, List, Set, cast
 import chess
 from .db_sync import update_game_state
+from .rate_limiter import rate_limiter, admission, SHED_ERROR, THROTTLE_ERROR
+from .game_log import GameEventLog
+from .session import SESSION_SECRET, read_session_token
+from .bots import BotScheduler, LEVELS
+from .presence import (
+    FriendGraph, PresenceTracker, OFFLINE, ONLINE, build_index, changed_users, friends_snapshot, user_room
+)
 import mysql.connector
 from mysql.connector import Error
 import random
@@ -22,6 +32,33 @@ games: Dict[str, chess.Board] = {}  # game_id -> chess board instance
 player_games: Dict[str, str] = {}  # socket_id -> game_id
 game_players: Dict[str, Dict[str, str]] = {}  # game_id -> {'white': socket_id, 'black': socket_id}
 
+# Crash recovery log of in-memory games
+SNAPSHOT_INTERVAL = 60  # seconds between compacted snapshots of active games
+RESTORED_GAME_TIMEOUT = 600  # seconds a recovered game waits for a player to rejoin
+game_log = GameEventLog()
+snapshot_task: asyncio.Task | None = None
+restored_games: Dict[str, float] = {}  # recovered game_id -> expiry time if nobody rejoins
+
+# Server-side bot players
+bot_scheduler = BotScheduler(
+    lambda game_id: games.get(game_id),
+    lambda game_id, sid: is_bot_turn(game_id, sid),
+    lambda sid, move: submit_bot_move(sid, move)
+)
+bot_seats: Dict[str, str] = {}  # bot socket_id -> level
+bot_users: Dict[int, str] = {}  # bot user_id -> level
+
+# Friends and presence state
+FRIEND_GRAPH_SYNC = 5  # seconds between polls for changed friendships
+FRIEND_GRAPH_OVERLAP = 10  # seconds each poll reaches back to catch late commits
+FRIEND_GRAPH_RELOAD = 600  # seconds between full reloads, which also catch deleted rows
+FRIEND_GRAPH_WAIT = 5  # seconds register_user waits for the initial load
+friend_graph = FriendGraph()
+friend_graph_ready = asyncio.Event()
+presence = PresenceTracker(lambda sid: player_games.get(sid) in games)
+last_presence: Dict[int, str] = {}  # user_id -> last status pushed to friends
+friend_graph_task: asyncio.Task | None = None
+
 def get_db_connection():
     """Create and return a MySQL database connection."""
     return mysql.connector.connect(
@@ -91,9 +128,393 @@ def get_active_game(game_id: int):
             cursor.close()
             connection.close()
 
+def check_event_allowed(sid: str, game_id: str | None) -> str | None:
+    """
+    Apply admission control and rate limits to an expensive game event.
+    
+    Args:
+        sid: Socket ID sending the event
+        game_id: Game the event targets, if known
+        
+    Returns:
+        Error message to send back to the client, or None if the event is allowed
+    """
+    if not admission.admit():
+        print(f"Shedding event from {sid}: server overloaded")
+        return SHED_ERROR
+    
+    exhausted = rate_limiter.allow(sid, game_id)
+    if exhausted:
+        print(f"Throttling event from {sid}: {exhausted} rate limit exceeded")
+        return THROTTLE_ERROR
+    return None
+
+def forget_game(game_id: str) -> List[str]:
+    """
+    Remove all in-memory state of a game.
+    
+    Returns:
+        Socket IDs of the players that were in the game
+    """
+    sockets = list(game_players.get(game_id, {}).values())
+    restored_games.pop(game_id, None)
+    if game_id in games:
+        del games[game_id]
+        game_log.record_end(game_id)
+    if game_id in game_players:
+        del game_players[game_id]
+    rate_limiter.forget_game(game_id)
+    
+    # Bots leave together with their game
+    for sid in sockets:
+        if sid in bot_seats:
+            del bot_seats[sid]
+            player_games.pop(sid, None)
+            rate_limiter.forget_socket(sid)
+    return sockets
+
+def bot_username(level: str) -> str:
+    """Username of the account a bot level plays under."""
+    return f"bot_{level}"
+
+def load_bot_users():
+    """Cache the user IDs of existing bot accounts."""
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT user_id, level FROM bot_accounts")
+        for user_id, level in cursor.fetchall():
+            if level in LEVELS:
+                bot_users[int(user_id)] = level
+    except Error as e:
+        print(f"Database error in load_bot_users: {e}")
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_bot_user_id(level: str) -> int:
+    """
+    Return the user ID of a bot level's account, creating the account if needed.
+    Only accounts listed in `bot_accounts` are bots; a user account with a
+    bot's name is never adopted.
+    
+    Args:
+        level (str): Bot level name
+        
+    Returns:
+        int: User ID of the bot account
+    """
+    for user_id, bot_level in bot_users.items():
+        if bot_level == level:
+            return user_id
+    
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT user_id FROM bot_accounts WHERE level = %s", (level,))
+        row = cursor.fetchone()
+        if row:
+            user_id = int(row[0])
+        else:
+            username, email = bot_username(level), f"{bot_username(level)}@chess360.local"
+            # Accounts created by earlier versions of the server have an empty
+            # password, which no registered user can have
+            cursor.execute("""
+                SELECT id FROM users WHERE username = %s AND email = %s AND password = ''
+            """, (username, email))
+            row = cursor.fetchone()
+            if row:
+                user_id = int(row[0])
+            else:
+                # Bot accounts have no password and cannot log in
+                cursor.execute("""
+                    INSERT INTO users (username, email, password, elo_rating)
+                    VALUES (%s, %s, '', %s)
+                """, (username, email, LEVELS[level].elo))
+                user_id = int(cursor.lastrowid)
+            cursor.execute("INSERT INTO bot_accounts (level, user_id) VALUES (%s, %s)", (level, user_id))
+            connection.commit()
+        bot_users[user_id] = level
+        return user_id
+    except Error:
+        print(f"Could not create the account of bot level {level}; is the name {bot_username(level)} taken?")
+        raise
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def seat_bot(game_id: str, color: str, level: str):
+    """
+    Seat a bot in a game under a pseudo socket ID, like a joining player.
+    
+    Args:
+        game_id (str): Game to join
+        color (str): 'white' or 'black'
+        level (str): Bot level name
+    """
+    sid = f"bot_{game_id}_{color}"
+    game_players.setdefault(game_id, {})[color] = sid
+    player_games[sid] = game_id
+    bot_seats[sid] = level
+
+def is_bot_turn(game_id: str, sid: str) -> bool:
+    """Tell whether a bot seat is still seated in a game and on the move."""
+    board = games.get(game_id)
+    if board is None:
+        return False
+    return game_players.get(game_id, {}).get('white' if board.turn == chess.WHITE else 'black') == sid
+
+def schedule_bot_turn(game_id: str):
+    """Queue a move for the bot seated in a game if it is the bot's turn."""
+    board = games.get(game_id)
+    if board is None or board.is_game_over():
+        return
+    sid = game_players.get(game_id, {}).get('white' if board.turn == chess.WHITE else 'black')
+    if sid in bot_seats:
+        bot_scheduler.request_move(game_id, sid, bot_seats[sid])
+
+def start_bots():
+    """Load bot accounts and start the bot scheduler."""
+    load_bot_users()
+    bot_scheduler.start()
+
+async def stop_bots():
+    """Stop the bot scheduler and its worker pools."""
+    await bot_scheduler.stop()
+
+def get_ongoing_game_ids() -> Set[str]:
+    """Return the IDs of all games the database still marks as ongoing."""
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT id FROM games WHERE status = 'ongoing'")
+        return {str(row[0]) for row in cursor.fetchall()}
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def expire_restored_games():
+    """Drop recovered games that no player rejoined in time."""
+    now = time.monotonic()
+    expired = [game_id for game_id, deadline in restored_games.items() if deadline <= now]
+    for game_id in expired:
+        forget_game(game_id)
+    if expired:
+        print(f"Expired {len(expired)} recovered games that nobody rejoined")
+
+async def snapshot_games():
+    """Periodically compact the game event log into a snapshot of active games."""
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        expire_restored_games()
+        if game_log.events_since_snapshot:
+            try:
+                game_log.snapshot(games)
+            except OSError as e:
+                print(f"Error writing game snapshot: {e}")
+
+def start_game_log():
+    """
+    Restore active games left by a previous process and start snapshotting.
+    Games that ended in the database meanwhile are dropped; the others expire
+    unless a player rejoins them within RESTORED_GAME_TIMEOUT.
+    """
+    global snapshot_task
+    games.update(game_log.recover())
+    
+    try:
+        ongoing = get_ongoing_game_ids()
+        for game_id in [game_id for game_id in games if game_id not in ongoing]:
+            forget_game(game_id)
+    except Error as e:
+        print(f"Database error checking recovered games, keeping all until they expire: {e}")
+    
+    deadline = time.monotonic() + RESTORED_GAME_TIMEOUT
+    restored_games.update((game_id, deadline) for game_id in games)
+    snapshot_task = asyncio.get_running_loop().create_task(snapshot_games())
+
+def stop_game_log():
+    """Write a final snapshot and close the game event log."""
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    game_log.snapshot(games)
+    game_log.close()
+
+def get_username(user_id: int) -> str | None:
+    """
+    Look up a user's name in the database.
+    
+    Args:
+        user_id (int): User to look up
+        
+    Returns:
+        The username, or None if the user does not exist
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT username FROM users WHERE id = %s", (user_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def load_friendships(edges: FrozenSet[int], usernames: Dict[int, str]):
+    """
+    Read all friendships and build their index. Runs in a worker thread so
+    that neither the read nor the index build blocks the event loop.
+    
+    Args:
+        edges: Encoded rows of the previous full load
+        usernames: Currently known usernames, copied and extended
+        
+    Returns:
+        Tuple of the new FriendIndex, the merged usernames, the users whose rows
+        changed since the previous full load and the database time of the read
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT NOW()")
+        synced_at = cursor.fetchone()[0]
+        cursor.execute("SELECT user_id, friend_id, status FROM friendships")
+        rows = cursor.fetchall()
+        cursor.execute("""
+            SELECT id, username FROM users
+            WHERE id IN (SELECT user_id FROM friendships UNION SELECT friend_id FROM friendships)
+        """)
+        merged = usernames.copy()
+        merged.update((int(user_id), username) for user_id, username in cursor.fetchall())
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+    
+    index = build_index(rows)
+    return index, merged, changed_users(edges, index.edges), synced_at
+
+def load_friendship_changes(since: datetime):
+    """
+    Read the friendships inserted or updated since a point in time.
+    
+    Args:
+        since: Database time to read changes from
+        
+    Returns:
+        Tuple of (user_id, friend_id, status) rows, a user_id -> username dict
+        of the users involved and the database time of the read
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT NOW()")
+        synced_at = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT f.user_id, f.friend_id, f.status, s.username, r.username
+            FROM friendships f
+            JOIN users s ON s.id = f.user_id
+            JOIN users r ON r.id = f.friend_id
+            WHERE f.updated_at >= %s
+        """, (since,))
+        rows, usernames = [], {}
+        for user_id, friend_id, status, sender_name, receiver_name in cursor.fetchall():
+            rows.append((user_id, friend_id, status))
+            usernames[int(user_id)] = sender_name
+            usernames[int(friend_id)] = receiver_name
+        return rows, usernames, synced_at
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+async def sync_friend_graph():
+    """
+    Keep the friendship index in sync with the database.
+    Changes made through the Socket.IO events are applied as they happen.
+    Rows inserted or updated by other clients of the database, such as the
+    PHP endpoints, are polled every FRIEND_GRAPH_SYNC seconds. Deleted rows
+    leave nothing to poll for, so the index is also rebuilt every
+    FRIEND_GRAPH_RELOAD seconds. Updates made during a read are replayed on
+    top of it, and affected online users get their new friend list pushed.
+    """
+    since = None
+    reloaded = 0.0
+    while True:
+        full = since is None or time.monotonic() - reloaded >= FRIEND_GRAPH_RELOAD
+        friend_graph.begin_reload()
+        try:
+            if full:
+                index, usernames, changed, synced_at = await asyncio.to_thread(
+                    load_friendships, friend_graph.edges, friend_graph.usernames
+                )
+            else:
+                rows, usernames, synced_at = await asyncio.to_thread(load_friendship_changes, since)
+        except Error as e:
+            friend_graph.abort_reload()
+            print(f"Database error in sync_friend_graph: {e}")
+        else:
+            if full:
+                # The index was built off the loop; only swap it in here
+                friend_graph.load(index, usernames)
+                friend_graph_ready.set()
+                reloaded = time.monotonic()
+                print(f"Friend graph loaded: {len(index.edges)} friendships")
+            else:
+                changed = friend_graph.apply(rows, usernames)
+            # Rows committed late may carry a slightly older timestamp
+            since = synced_at - timedelta(seconds=FRIEND_GRAPH_OVERLAP)
+            
+            for user_id in presence.online(changed):
+                await sio.emit('friends_list', friends_snapshot(friend_graph, presence, user_id),
+                               room=user_room(user_id))
+        await asyncio.sleep(FRIEND_GRAPH_SYNC)
+
+def start_friend_graph():
+    """Start loading the friendship index and keeping it in sync."""
+    global friend_graph_task
+    if not SESSION_SECRET:
+        print("CHESS360_SESSION_SECRET is not set, register_user will reject all clients")
+    friend_graph_task = asyncio.get_running_loop().create_task(sync_friend_graph())
+
+def stop_friend_graph():
+    """Stop syncing the friendship index."""
+    if friend_graph_task is not None:
+        friend_graph_task.cancel()
+
+async def push_presence(user_id: int):
+    """
+    Notify a user's online friends when their presence status changes.
+    
+    Args:
+        user_id (int): User whose status may have changed
+    """
+    status = presence.status(user_id)
+    if last_presence.get(user_id, OFFLINE) == status:
+        return
+    if status == OFFLINE:
+        last_presence.pop(user_id, None)
+    else:
+        last_presence[user_id] = status
+    
+    payload = {'userId': user_id, 'status': status}
+    for friend_id in presence.online(friend_graph.get_friends(user_id)):
+        await sio.emit('friend_status', payload, room=user_room(friend_id))
+
+async def push_presence_for_sockets(sockets: List[str]):
+    """Push presence updates for the users behind a list of sockets."""
+    for user_id in {presence.get_user(sid) for sid in sockets}:
+        if user_id is not None:
+            await push_presence(user_id)
+
 @sio.event
 async def connect(sid, environ):
     """Handle new client connection."""
+    admission.start()
     print(f"Client connected: {sid}")
 
 @sio.event
@@ -103,13 +524,19 @@ async def disconnect(sid):
         game_id = player_games[sid]
         
         # Clean up in-memory game state
-        if game_id in games:
-            del games[game_id]
-        if game_id in game_players:
-            del game_players[game_id]
+        sockets = forget_game(game_id)
         del player_games[sid]
         
         print(f"Player disconnected: {sid}")
+    else:
+        sockets = []
+    rate_limiter.forget_socket(sid)
+    
+    # Update presence of the disconnecting user and of their opponent
+    user_id = presence.remove_socket(sid)
+    if user_id is not None:
+        await push_presence(user_id)
+    await push_presence_for_sockets(sockets)
 
 @sio.event
 async def join_game(sid, data):
@@ -123,39 +550,43 @@ async def join_game(sid, data):
     if not data or 'gameId' not in data or 'color' not in data:
         print(f"Invalid join_game data from {sid}")
         return
-        
+    rejection = check_event_allowed(sid, None)
+    if rejection:
+        return {'error': rejection}
+    
     game_id = str(data['gameId'])
     color = data['color']
     socket_room = f"game_{game_id}"
     
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Ensure active game entry exists
-        cursor.execute("""
-            SELECT * FROM active_games WHERE game_id = %s
-        """, (game_id,))
-        
-        active_game = cursor.fetchone()
-        if not active_game:
-            # Create new active game entry
+        with admission.db_call():
+            connection = get_db_connection()
+            cursor = connection.cursor(dictionary=True)
+            
+            # Ensure active game entry exists
             cursor.execute("""
-                INSERT INTO active_games 
-                (game_id, socket_room, current_turn, game_status) 
-                VALUES (%s, %s, 'white', 'active')
-            """, (game_id, socket_room))
-            connection.commit()
-        
-        # Retrieve current game state
-        cursor.execute("""
-            SELECT g.*, ag.current_turn, g.current_position 
-            FROM games g
-            JOIN active_games ag ON g.id = ag.game_id
-            WHERE g.id = %s
-        """, (game_id,))
-        
-        game_data = cast(Dict[str, Any], cursor.fetchone())
+                SELECT * FROM active_games WHERE game_id = %s
+            """, (game_id,))
+            
+            active_game = cursor.fetchone()
+            if not active_game:
+                # Create new active game entry
+                cursor.execute("""
+                    INSERT INTO active_games 
+                    (game_id, socket_room, current_turn, game_status) 
+                    VALUES (%s, %s, 'white', 'active')
+                """, (game_id, socket_room))
+                connection.commit()
+            
+            # Retrieve current game state
+            cursor.execute("""
+                SELECT g.*, ag.current_turn, g.current_position 
+                FROM games g
+                JOIN active_games ag ON g.id = ag.game_id
+                WHERE g.id = %s
+            """, (game_id,))
+            
+            game_data = cast(Dict[str, Any], cursor.fetchone())
         
         if game_data:
             current_position = game_data.get('current_position')
@@ -163,16 +594,25 @@ async def join_game(sid, data):
                 if game_id not in games:
                     board = chess.Board(current_position)
                     games[game_id] = board
+                    game_log.record_join(game_id, board)
             
             if game_id not in game_players:
                 game_players[game_id] = {}
             
+            # Seat bot opponents, including after a server restart
+            for seat in ('white', 'black'):
+                bot_level = bot_users.get(int(game_data.get(f'{seat}_player_id') or 0))
+                if bot_level and seat not in game_players[game_id]:
+                    seat_bot(game_id, seat, bot_level)
+            
             # Register player in game
             game_players[game_id][color] = sid
             player_games[sid] = game_id
+            restored_games.pop(game_id, None)
             
             # Add player to game room
             await sio.enter_room(sid, socket_room)
+            await push_presence_for_sockets([sid])
             
             is_white_turn = game_data.get('current_turn') == 'white'
             
@@ -185,6 +625,7 @@ async def join_game(sid, data):
             }, room=socket_room)
             
             print(f"Player joined: color={color}, is_white_turn={is_white_turn}")
+            schedule_bot_turn(game_id)
             
     except Error as e:
         print(f"Database error in join_game: {e}")
@@ -204,6 +645,11 @@ async def get_legal_moves(sid, data):
     """
     try:
         game_id = player_games.get(sid)
+        rejection = check_event_allowed(sid, game_id)
+        if rejection:
+            await sio.emit('legal_moves', {'legal_moves': [], 'error': rejection}, room=sid)
+            return
+        
         if not game_id or game_id not in games:
             print(f"Game not found for socket {sid}")
             await sio.emit('legal_moves', {'legal_moves': [], 'error': 'Game not found'}, room=sid)
@@ -242,6 +688,10 @@ async def make_move(sid, data):
     """
     try:
         game_id = player_games.get(sid)
+        rejection = check_event_allowed(sid, game_id)
+        if rejection:
+            return {'error': rejection}
+        
         if not game_id or game_id not in games:
             print(f"Game not found for socket {sid}")
             return {'error': 'Game not found'}
@@ -260,12 +710,14 @@ async def make_move(sid, data):
         # Validate and execute the move
         if move in board.legal_moves:
             board.push(move)
+            game_log.record_move(game_id, data['move'])
             new_fen = board.fen()
             print(f"Valid move made: {data['move']}, new position: {new_fen}")
             
             try:
                 # Update database with new game state
-                update_game_state(int(game_id), new_fen, data['move'])
+                with admission.db_call():
+                    update_game_state(int(game_id), new_fen, data['move'])
                 
                 socket_room = f"game_{game_id}"
                 # Broadcast move to all players in the game
@@ -279,7 +731,8 @@ async def make_move(sid, data):
                     status = ''
                     winner_id = None
                     
-                    players = get_game_players_from_db(int(game_id))
+                    with admission.db_call():
+                        players = get_game_players_from_db(int(game_id))
 
                     if players:
                         if board.is_checkmate():
@@ -297,11 +750,9 @@ async def make_move(sid, data):
                                 'gameId': game_id
                             }, room=socket_room)
                             # Clean up in-memory game state
-                            if game_id in games:
-                                del games[game_id]
-                            if game_id in game_players:
-                                del game_players[game_id]
+                            await push_presence_for_sockets(forget_game(game_id))
 
+                schedule_bot_turn(game_id)
                 return {'status': 'ok'}
             
             except Exception as e:
@@ -317,4 +768,271 @@ async def make_move(sid, data):
         return {'error': 'Invalid move format'}
     except Exception as e:
         print(f"An unexpected error occurred in make_move: {e}")
-        return {'error': 'An internal server error occurred'}
\ No newline at end of file
+        return {'error': 'An internal server error occurred'}
+
+@sio.event
+async def register_user(sid, data):
+    """
+    Associate a socket with a logged-in user and start presence updates.
+    
+    Args:
+        sid: Socket ID of the client
+        data: Dictionary containing token, the session token returned by login.php
+        
+    Returns:
+        Dict: Friend list with presence and pending requests
+    """
+    if not data or not data.get('token'):
+        return {'error': 'Invalid input'}
+    rejection = check_event_allowed(sid, None)
+    if rejection:
+        return {'error': rejection}
+    
+    user_id = read_session_token(data['token'])
+    if user_id is None:
+        print(f"Rejected registration with an invalid session token on {sid}")
+        return {'error': 'Invalid session'}
+    if user_id not in friend_graph.usernames:
+        try:
+            with admission.db_call():
+                username = get_username(user_id)
+        except Error as e:
+            print(f"Database error in register_user: {e}")
+            return {'error': 'Failed to register'}
+        if username is None:
+            return {'error': 'Unknown user'}
+        friend_graph.add_user(user_id, username)
+    
+    presence.add_socket(sid, user_id)
+    
+    # Answer with a complete friend list once the initial load is done
+    try:
+        await asyncio.wait_for(friend_graph_ready.wait(), FRIEND_GRAPH_WAIT)
+    except asyncio.TimeoutError:
+        print("Friend graph not loaded yet, sending partial friend list")
+    
+    await sio.enter_room(sid, user_room(user_id))
+    await push_presence(user_id)
+    return {'status': 'ok', **friends_snapshot(friend_graph, presence, user_id)}
+
+@sio.event
+async def get_friends(sid, data=None):
+    """
+    Return the friend list of the user registered on this socket.
+    
+    Returns:
+        Dict: Friend list with presence and pending requests
+    """
+    user_id = presence.get_user(sid)
+    if user_id is None:
+        return {'error': 'Not registered'}
+    return {'status': 'ok', **friends_snapshot(friend_graph, presence, user_id)}
+
+@sio.event
+async def send_friend_request(sid, data):
+    """
+    Send a friend request and notify the receiver if they are online.
+    
+    Args:
+        sid: Socket ID of the sender
+        data: Dictionary containing receiverId
+        
+    Returns:
+        Dict: Status of the request
+    """
+    sender_id = presence.get_user(sid)
+    if sender_id is None or not data or 'receiverId' not in data:
+        return {'error': 'Invalid input'}
+    rejection = check_event_allowed(sid, None)
+    if rejection:
+        return {'error': rejection}
+    
+    receiver_id = int(data['receiverId'])
+    if receiver_id == sender_id or friend_graph.status(sender_id, receiver_id) != 'none':
+        return {'error': 'Request already exists'}
+    
+    try:
+        with admission.db_call():
+            connection = get_db_connection()
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT INTO friendships (user_id, friend_id, status) VALUES (%s, %s, 'pending')
+            """, (sender_id, receiver_id))
+            connection.commit()
+    except Error as e:
+        print(f"Database error in send_friend_request: {e}")
+        return {'error': 'Failed to send request'}
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+    
+    friend_graph.add_request(sender_id, receiver_id)
+    await sio.emit('friend_request', {
+        'id': sender_id,
+        'username': friend_graph.usernames.get(sender_id)
+    }, room=user_room(receiver_id))
+    return {'status': 'ok'}
+
+@sio.event
+async def respond_friend_request(sid, data):
+    """
+    Accept or decline a pending friend request.
+    
+    Args:
+        sid: Socket ID of the receiver
+        data: Dictionary containing senderId and action ('accept' or 'decline')
+        
+    Returns:
+        Dict: Status of the operation
+    """
+    receiver_id = presence.get_user(sid)
+    if receiver_id is None or not data or 'senderId' not in data or 'action' not in data:
+        return {'error': 'Invalid input'}
+    rejection = check_event_allowed(sid, None)
+    if rejection:
+        return {'error': rejection}
+    
+    sender_id = int(data['senderId'])
+    accept = data['action'] == 'accept'
+    
+    try:
+        with admission.db_call():
+            connection = get_db_connection()
+            cursor = connection.cursor()
+            if accept:
+                cursor.execute("""
+                    UPDATE friendships SET status = 'accepted'
+                    WHERE user_id = %s AND friend_id = %s AND status = 'pending'
+                """, (sender_id, receiver_id))
+            else:
+                cursor.execute("""
+                    DELETE FROM friendships
+                    WHERE user_id = %s AND friend_id = %s AND status = 'pending'
+                """, (sender_id, receiver_id))
+            connection.commit()
+        if cursor.rowcount == 0:
+            return {'error': 'Request not found'}
+    except Error as e:
+        print(f"Database error in respond_friend_request: {e}")
+        return {'error': 'Failed to process request'}
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+    
+    if accept:
+        friend_graph.accept(sender_id, receiver_id)
+        # Both sides learn about each other's current presence
+        await sio.emit('friend_status', {
+            'userId': receiver_id,
+            'status': presence.status(receiver_id),
+            'username': friend_graph.usernames.get(receiver_id)
+        }, room=user_room(sender_id))
+        await sio.emit('friend_status', {
+            'userId': sender_id,
+            'status': presence.status(sender_id),
+            'username': friend_graph.usernames.get(sender_id)
+        }, room=user_room(receiver_id))
+    else:
+        friend_graph.remove(sender_id, receiver_id)
+    return {'status': 'ok'}
+
+@sio.event
+async def send_game_invite(sid, data):
+    """
+    Invite an online friend to a game.
+    
+    Args:
+        sid: Socket ID of the inviting player
+        data: Dictionary containing friendId and optionally gameType
+        
+    Returns:
+        Dict: Status of the invite
+    """
+    sender_id = presence.get_user(sid)
+    if sender_id is None or not data or 'friendId' not in data:
+        return {'error': 'Invalid input'}
+    rejection = check_event_allowed(sid, None)
+    if rejection:
+        return {'error': rejection}
+
+    friend_id = int(data['friendId'])
+    if friend_id not in friend_graph.get_friends(sender_id):
+        return {'error': 'Not friends'}
+    if presence.status(friend_id) != ONLINE:
+        return {'error': 'Friend is not available'}
+    
+    game_type = 'chess960' if data.get('gameType') == 'chess960' else 'standard'
+    await sio.emit('game_invite', {
+        'fromId': sender_id,
+        'username': friend_graph.usernames.get(sender_id),
+        'gameType': game_type
+    }, room=user_room(friend_id))
+    return {'status': 'ok'}
+
+
+async def submit_bot_move(sid: str, move: str) -> Dict[str, Any]:
+    """Play a bot's move through the same path as a human player's."""
+    return await make_move(sid, {'move': move})
+
+@sio.event
+async def play_bot(sid, data):
+    """
+    Create a game against a server-side bot for the user registered on
+    this socket.
+    
+    Args:
+        sid: Socket ID of the human player
+        data: Dictionary containing optionally level, color
+              ('white', 'black' or 'random') and variant
+        
+    Returns:
+        Dict: Game ID, the player's color and the starting position, to be
+              followed by a regular join_game
+    """
+    user_id = presence.get_user(sid)
+    if user_id is None:
+        return {'error': 'Not registered'}
+    rejection = check_event_allowed(sid, None)
+    if rejection:
+        return {'error': rejection}
+    data = data or {}
+    
+    level = data.get('level', 'medium')
+    if level not in LEVELS:
+        return {'error': 'Unknown bot level'}
+    
+    color = data.get('color', 'random')
+    if color not in ('white', 'black'):
+        color = random.choice(['white', 'black'])
+    
+    if data.get('variant') == 'chess960':
+        board = chess.Board.from_chess960_pos(random.randint(0, 959))
+    else:
+        board = chess.Board()
+    fen = board.fen()
+    
+    try:
+        with admission.db_call():
+            bot_id = get_bot_user_id(level)
+            white_id, black_id = (user_id, bot_id) if color == 'white' else (bot_id, user_id)
+            
+            connection = get_db_connection()
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT INTO games (white_player_id, black_player_id, game_type, initial_fen, current_position, status)
+                VALUES (%s, %s, %s, %s, %s, 'ongoing')
+            """, (white_id, black_id, 'chess960' if board.chess960 else 'standard', fen, fen))
+            connection.commit()
+            game_id = str(cursor.lastrowid)
+    except Error as e:
+        print(f"Database error in play_bot: {e}")
+        return {'error': 'Failed to create game'}
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+    
+    print(f"Bot game created: game={game_id}, level={level}, player color={color}")
+    return {'status': 'ok', 'gameId': game_id, 'color': color, 'fen': fen}
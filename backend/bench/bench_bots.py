@@ -0,0 +1,71 @@
+import asyncio
+import random
+import time
+import chess
+from api.bots import BotScheduler, LEVELS
+
+"""
+Bot Capacity Benchmark
+Runs many concurrent bot games on a single search worker (one core). The
+human side replies instantly, so the scheduler is saturated, and the sustained
+bot move rate is measured per level. Dividing into the time a human takes per
+move gives the number of concurrent bot games one core can sustain.
+
+Run from backend/: python -m bench.bench_bots
+"""
+
+GAMES = 500
+DURATION = 10.0  # seconds per level
+HUMAN_MOVE_TIME = 10.0  # assumed seconds a human spends per move
+BUILT_IN_LEVELS = [level for level, settings in LEVELS.items() if not settings.uci]
+
+
+async def run_level(level: str):
+    rng = random.Random(0)
+    games = {str(i): chess.Board() for i in range(GAMES)}
+    scheduler: BotScheduler
+
+    def human_move(game_id: str):
+        """Reply for the human side, starting a new game when one ends."""
+        board = games[game_id]
+        if board.is_game_over():
+            board.reset()
+        board.push(rng.choice(list(board.legal_moves)))
+        if board.is_game_over():
+            board.reset()
+            board.push(rng.choice(list(board.legal_moves)))
+        scheduler.request_move(game_id, game_id, level)
+
+    async def submit(sid: str, move: str):
+        games[sid].push_uci(move)
+        asyncio.get_running_loop().call_soon(human_move, sid)
+        return {'status': 'ok'}
+
+    def is_bot_turn(game_id: str, sid: str) -> bool:
+        return games[game_id].turn == chess.BLACK
+
+    scheduler = BotScheduler(games.get, is_bot_turn, submit, workers=1)
+    scheduler.start()
+    try:
+        # Warm up the worker process before measuring
+        await asyncio.sleep(0.5)
+        for game_id in games:
+            human_move(game_id)
+        started = time.perf_counter()
+        await asyncio.sleep(DURATION)
+        rate = scheduler.moves_played / (time.perf_counter() - started)
+    finally:
+        await scheduler.stop()
+
+    think_time = LEVELS[level].think_time
+    print(f"{level:7s} (budget {think_time:.1f}s): {rate:8.1f} bot moves/s per core, "
+          f"~{rate * HUMAN_MOVE_TIME:7.0f} concurrent games at {HUMAN_MOVE_TIME:.0f}s per human move")
+
+
+def main():
+    for level in BUILT_IN_LEVELS:
+        asyncio.run(run_level(level))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import random
+import time
+from api.presence import FriendGraph, PresenceTracker, build_index, changed_users, friends_snapshot, user_room
+
+"""
+Presence Fan-out Benchmark
+Measures the work done when a user with hundreds of friends changes status:
+selecting the online friends to notify and building friend list snapshots.
+Socket.IO emits are replaced by building the target room name so only the server-side cost is timed.
+Also times a full reload of the friendship index, split into the part that
+runs in a worker thread and the part left on the event loop.
+
+Run from backend/: python -m bench.bench_presence
+"""
+
+USERS = 20000
+FRIEND_COUNTS = [100, 300, 500]
+ONLINE_SHARE = 0.5
+SAMPLES = 2000
+RELOAD_ROWS = 1000000
+
+
+def build(friends_per_user: int):
+    """Create a random friendship graph and mark a share of users online."""
+    rng = random.Random(friends_per_user)
+    # Each row links both users, so half the rows per user give the target degree
+    rows = set()
+    for user_id in range(1, USERS + 1):
+        for friend_id in rng.sample(range(1, USERS + 1), friends_per_user // 2):
+            if friend_id != user_id:
+                rows.add((user_id, friend_id, 'accepted'))
+    graph = FriendGraph()
+    graph.load(build_index(list(rows)), {user_id: f"user{user_id}" for user_id in range(1, USERS + 1)})
+
+    tracker = PresenceTracker(lambda sid: False)
+    for user_id in rng.sample(range(1, USERS + 1), int(USERS * ONLINE_SHARE)):
+        tracker.add_socket(f"sid{user_id}", user_id)
+    return graph, tracker
+
+
+def main():
+    for friends_per_user in FRIEND_COUNTS:
+        graph, tracker = build(friends_per_user)
+        rng = random.Random(0)
+        users = [rng.randint(1, USERS) for _ in range(SAMPLES)]
+        degree = sum(len(graph.get_friends(user_id)) for user_id in users) / SAMPLES
+
+        emitted = 0
+        started = time.perf_counter()
+        for user_id in users:
+            tracker.status(user_id)
+            for friend_id in tracker.online(graph.get_friends(user_id)):
+                user_room(friend_id)
+                emitted += 1
+        fanout = (time.perf_counter() - started) / SAMPLES
+
+        started = time.perf_counter()
+        for user_id in users:
+            friends_snapshot(graph, tracker, user_id)
+        snapshot = (time.perf_counter() - started) / SAMPLES
+
+        print(f"{degree:6.0f} friends/user: fan-out {fanout * 1e6:7.1f} us "
+              f"({emitted / SAMPLES:5.0f} notified), friend list {snapshot * 1e6:7.1f} us")
+
+    rng = random.Random(1)
+    rows = [(rng.randint(1, USERS * 10), rng.randint(1, USERS * 10), 'accepted') for _ in range(RELOAD_ROWS)]
+    graph = FriendGraph()
+    started = time.perf_counter()
+    index = build_index(rows)
+    changed = changed_users(graph.edges, index.edges)
+    built = time.perf_counter() - started
+
+    graph.begin_reload()
+    started = time.perf_counter()
+    graph.load(index, {})
+    swapped = time.perf_counter() - started
+    print(f"reload of {RELOAD_ROWS} rows: index build {built:.2f} s in worker thread "
+          f"({len(changed)} changed users), swap {swapped * 1e6:.1f} us on event loop")
+
+
+if __name__ == '__main__':
+    main()
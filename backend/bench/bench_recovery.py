@@ -0,0 +1,77 @@
+import random
+import shutil
+import tempfile
+import time
+import chess
+from api.game_log import GameEventLog
+
+"""
+Crash Recovery Benchmark
+Fills the game event log with 50k active games, compacts it into a snapshot,
+appends a log tail, and times recovery. Rebuilding the same boards from FEN
+is timed as a baseline.
+
+Run from backend/: python -m bench.bench_recovery
+"""
+
+GAMES = 50000
+OPENING_MOVES = 6  # moves played before the snapshot
+TAIL_EVERY = 5  # one game in TAIL_EVERY moves again after the snapshot
+ENDED = 100  # games ending after the snapshot
+
+
+def play_random_move(log: GameEventLog, game_id: str, board: chess.Board, rng: random.Random):
+    moves = list(board.legal_moves)
+    if moves:
+        move = rng.choice(moves)
+        board.push(move)
+        log.record_move(game_id, move.uci())
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        rng = random.Random(0)
+        log = GameEventLog(directory)
+        games = log.recover()
+        for i in range(1, GAMES + 1):
+            board = chess.Board.from_chess960_pos(i % 960) if i % 2 else chess.Board()
+            games[str(i)] = board
+            log.record_join(str(i), board)
+            for _ in range(OPENING_MOVES):
+                play_random_move(log, str(i), board, rng)
+
+        started = time.perf_counter()
+        log.snapshot(games)
+        snapshot_time = time.perf_counter() - started
+
+        for i in range(1, GAMES + 1, TAIL_EVERY):
+            play_random_move(log, str(i), games[str(i)], rng)
+        for i in range(1, ENDED + 1):
+            log.record_end(str(i))
+            del games[str(i)]
+        log.close()
+
+        started = time.perf_counter()
+        recovered = GameEventLog(directory).recover()
+        recovery_time = time.perf_counter() - started
+
+        assert set(recovered) == set(games)
+        assert all(recovered[game_id].fen() == board.fen() for game_id, board in games.items())
+
+        fens = [(board.fen(), board.chess960) for board in games.values()]
+        started = time.perf_counter()
+        for fen, chess960 in fens:
+            chess.Board(fen, chess960=chess960)
+        fen_time = time.perf_counter() - started
+
+        print(f"games: {len(recovered)}")
+        print(f"snapshot write: {snapshot_time:.3f}s")
+        print(f"recovery (snapshot + {GAMES // TAIL_EVERY + ENDED} tail events): {recovery_time:.3f}s")
+        print(f"baseline FEN parsing of the same boards: {fen_time:.3f}s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -38,6 +38,17 @@ CREATE TABLE `active_games` (
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `bot_accounts`
+--
+
+CREATE TABLE `bot_accounts` (
+  `level` varchar(20) NOT NULL,
+  `user_id` int(11) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `friendships`
 --
@@ -47,7 +58,8 @@ CREATE TABLE `friendships` (
   `user_id` int(11) NOT NULL,
   `friend_id` int(11) NOT NULL,
   `status` enum('pending','accepted') NOT NULL,
-  `created_at` timestamp NOT NULL DEFAULT current_timestamp()
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
 -- --------------------------------------------------------
@@ -160,6 +172,13 @@ ALTER TABLE `active_games`
   ADD PRIMARY KEY (`id`),
   ADD KEY `game_id` (`game_id`);
 
+--
+-- Indexes for table `bot_accounts`
+--
+ALTER TABLE `bot_accounts`
+  ADD PRIMARY KEY (`level`),
+  ADD UNIQUE KEY `user_id` (`user_id`);
+
 --
 -- Indexes for table `friendships`
 --
@@ -168,7 +187,8 @@ ALTER TABLE `friendships`
   ADD KEY `friend_id` (`friend_id`),
   ADD KEY `idx_friendships_users` (`user_id`,`friend_id`),
   ADD KEY `idx_friendship_status` (`status`),
-  ADD KEY `idx_user_friends` (`user_id`,`friend_id`);
+  ADD KEY `idx_user_friends` (`user_id`,`friend_id`),
+  ADD KEY `idx_friendship_updated` (`updated_at`);
 
 --
 -- Indexes for table `friend_requests`
@@ -272,6 +292,12 @@ ALTER TABLE `users`
 ALTER TABLE `active_games`
   ADD CONSTRAINT `active_games_ibfk_1` FOREIGN KEY (`game_id`) REFERENCES `games` (`id`);
 
+--
+-- Constraints for table `bot_accounts`
+--
+ALTER TABLE `bot_accounts`
+  ADD CONSTRAINT `bot_accounts_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`);
+
 --
 -- Constraints for table `friendships`
 --
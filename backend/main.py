@@ -1,16 +1,31 @@
 import socketio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router
-from api.socket_manager import sio
+from api.socket_manager import (
+    sio, start_game_log, stop_game_log, start_bots, stop_bots, start_friend_graph, stop_friend_graph
+)
 
 """
 Chess360 Backend Server
 Combines FastAPI for REST endpoints and Socket.IO for real-time game communication.
 """
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Restore in-flight games and start background services; stop them on shutdown."""
+    start_game_log()
+    start_bots()
+    start_friend_graph()
+    yield
+    stop_friend_graph()
+    await stop_bots()
+    stop_game_log()
+
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Chess360",
     description="Chess 360, a wider view of chess",
     version="0.1.0",
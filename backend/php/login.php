@@ -14,6 +14,7 @@ header('Access-Control-Allow-Headers: Access-Control-Allow-Headers,Content-Type,
 
 // Include database configuration
 require_once 'config.php';
+require_once 'session.php';
 
 // Parse incoming JSON data
 $data = json_decode(file_get_contents("php://input"));
@@ -38,7 +39,9 @@ if(isset($data->email) && isset($data->password)) {
                     'id' => $user['id'],
                     'username' => $user['username'],
                     'email' => $user['email']
-                ]
+                ],
+                // Proves the login to the Socket.IO server
+                'token' => create_session_token($user['id'])
             ]);
         } else {
             echo json_encode(['status' => 'error', 'message' => 'Invalid password']);
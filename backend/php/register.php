@@ -17,6 +17,11 @@ if(isset($data->email) && isset($data->password) && isset($data->username)) {
     $conn->begin_transaction();
     
     try {
+        // Bot account names and the server's own email domain are reserved
+        if(stripos($data->username, 'bot_') === 0 || preg_match('/@chess360\.local$/i', $data->email)) {
+            throw new Exception('Username or email is reserved');
+        }
+        
         // Check for existing email address
         $check_sql = "SELECT id FROM users WHERE email = ?";
         $check_stmt = $conn->prepare($check_sql);
@@ -0,0 +1,26 @@
+<?php
+/**
+ * Session Token Helper
+ *
+ * Issues signed session tokens that the Python Socket.IO server can verify
+ * without a database lookup. Both sides read the shared secret from the
+ * CHESS360_SESSION_SECRET environment variable.
+ */
+
+// Seconds a session token stays valid
+const SESSION_TOKEN_TTL = 7 * 24 * 3600;
+
+/**
+ * Create a session token for a logged-in user.
+ *
+ * @param int $user_id User the token identifies
+ * @return string|null Token "<user_id>.<expires>.<signature>", or null if no secret is configured
+ */
+function create_session_token($user_id) {
+    $secret = getenv('CHESS360_SESSION_SECRET');
+    if (!$secret) {
+        return null;
+    }
+    $payload = $user_id . '.' . (time() + SESSION_TOKEN_TTL);
+    return $payload . '.' . hash_hmac('sha256', $payload, $secret);
+}
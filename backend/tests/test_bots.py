@@ -0,0 +1,162 @@
+import asyncio
+import time
+import chess
+import chess.engine
+from api import bots
+from api.bots import BotScheduler, EnginePool, choose_move
+from api.rate_limiter import SHED_ERROR
+
+"""
+Tests for the bot searcher, engine pool and bot scheduler.
+"""
+
+
+def test_search_finds_mate_in_one():
+    assert choose_move('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1', False, 2, 1.0) == 'a1a8'
+
+
+def test_search_takes_hanging_queen():
+    assert choose_move('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1', False, 2, 1.0) == 'd2d5'
+
+
+def run_scheduler(scenario, submit, is_bot_turn=lambda game_id, sid: True, games=None):
+    """Run a scenario against a one-worker scheduler over a single game."""
+    games = games if games is not None else {'1': chess.Board()}
+
+    async def main():
+        scheduler = BotScheduler(games.get, is_bot_turn, submit, workers=1)
+        scheduler.start()
+        try:
+            await scenario(scheduler)
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_rejected_move_is_not_retried():
+    submitted = []
+
+    async def submit(sid, move):
+        submitted.append(move)
+        return {'error': 'Not your turn'}
+
+    async def scenario(scheduler):
+        scheduler.request_move('1', 'bot', 'easy')
+        await asyncio.sleep(1.0)
+
+    run_scheduler(scenario, submit)
+    assert len(submitted) == 1
+
+
+def test_shed_move_is_resubmitted_without_searching_again():
+    submitted = []
+    searches = []
+
+    async def submit(sid, move):
+        submitted.append(move)
+        return {'error': SHED_ERROR} if len(submitted) < 3 else {'status': 'ok'}
+
+    async def scenario(scheduler):
+        search = scheduler.executor.submit
+
+        def count_searches(fn, *args):
+            searches.append(args)
+            return search(fn, *args)
+
+        scheduler.executor.submit = count_searches
+        scheduler.request_move('1', 'bot', 'easy')
+        await asyncio.sleep(1.0)
+        assert scheduler.moves_played == 1
+        assert not scheduler.pending
+
+    run_scheduler(scenario, submit)
+    assert len(submitted) == 3 and len(set(submitted)) == 1
+    assert len(searches) == 1
+
+
+def test_default_workers_leave_a_core_for_the_event_loop(monkeypatch):
+    monkeypatch.setattr(bots.os, 'cpu_count', lambda: 8)
+    assert BotScheduler(None, None, None).workers == 7
+    monkeypatch.setattr(bots.os, 'cpu_count', lambda: 1)
+    assert BotScheduler(None, None, None).workers == 1
+
+
+def test_bot_does_not_move_for_the_other_side():
+    submitted = []
+
+    async def submit(sid, move):
+        submitted.append(move)
+        return {'status': 'ok'}
+
+    async def scenario(scheduler):
+        scheduler.request_move('1', 'bot', 'easy')
+        await asyncio.sleep(0.5)
+        assert not scheduler.pending
+
+    run_scheduler(scenario, submit, is_bot_turn=lambda game_id, sid: False)
+    assert submitted == []
+
+
+def test_engine_backlog_does_not_block_built_in_search():
+    games = {str(i): chess.Board() for i in range(20)}
+    played = {}
+
+    async def submit(sid, move):
+        played[sid] = time.monotonic()
+        return {'status': 'ok'}
+
+    async def slow_engine(board, think_time):
+        await asyncio.sleep(1.0)
+        return None
+
+    async def scenario(scheduler):
+        scheduler.engines.play = slow_engine
+        started = time.monotonic()
+        for i in range(19):
+            scheduler.request_move(str(i), f"engine_{i}", 'engine')
+        scheduler.request_move('19', 'easy_bot', 'easy')
+        await asyncio.sleep(0.8)
+        assert played['easy_bot'] - started < 0.5
+
+    run_scheduler(scenario, submit, games=games)
+
+
+class FakeEngine:
+    """Stands in for a UCI engine process; the first one crashes on play."""
+    started = 0
+
+    def __init__(self):
+        FakeEngine.started += 1
+        self.crash = FakeEngine.started == 1
+
+    async def play(self, board, limit):
+        if self.crash:
+            raise chess.engine.EngineTerminatedError('engine died')
+        return chess.engine.PlayResult(next(iter(board.legal_moves)), None)
+
+    async def quit(self):
+        pass
+
+
+def test_crashed_engine_is_replaced(monkeypatch):
+    async def popen_uci(path):
+        return None, FakeEngine()
+
+    monkeypatch.setattr(bots.chess.engine, 'popen_uci', popen_uci)
+    FakeEngine.started = 0
+
+    async def scenario():
+        pool = EnginePool(size=1)
+        try:
+            await pool.play(chess.Board(), 0.1)
+        except chess.engine.EngineTerminatedError:
+            pass
+        assert pool.started == 0 and pool.idle.empty()
+
+        assert await pool.play(chess.Board(), 0.1) is not None
+        assert FakeEngine.started == 2
+        assert await pool.play(chess.Board(), 0.1) is not None
+        assert FakeEngine.started == 2
+
+    asyncio.run(scenario())
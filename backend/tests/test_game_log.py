@@ -0,0 +1,56 @@
+import os
+import chess
+from api.game_log import GameEventLog
+
+"""
+Tests for the game event log and snapshot recovery.
+"""
+
+
+def test_recovers_snapshot_plus_log_tail(tmp_path):
+    log = GameEventLog(str(tmp_path))
+    games = log.recover()
+    games['1'] = chess.Board()
+    games['2'] = chess.Board.from_chess960_pos(300)
+    for game_id, board in games.items():
+        log.record_join(game_id, board)
+    games['1'].push_uci('e2e4')
+    log.record_move('1', 'e2e4')
+    log.snapshot(games)
+
+    games['1'].push_uci('e7e5')
+    log.record_move('1', 'e7e5')
+    log.record_end('2')
+    del games['2']
+    log.close()
+
+    recovered = GameEventLog(str(tmp_path)).recover()
+    assert set(recovered) == {'1'}
+    assert recovered['1'].fen() == games['1'].fen()
+    assert sorted(os.listdir(tmp_path)) == ['events-1.log', 'snapshot-1.seg']
+
+
+def test_chess960_castling_survives_snapshot(tmp_path):
+    log = GameEventLog(str(tmp_path))
+    log.recover()
+    board = chess.Board.from_chess960_pos(518 + 1)
+    log.snapshot({'7': board})
+    log.close()
+
+    recovered = GameEventLog(str(tmp_path)).recover()['7']
+    assert recovered.chess960
+    assert recovered.fen() == board.fen()
+    assert set(recovered.legal_moves) == set(board.legal_moves)
+
+
+def test_torn_record_is_dropped(tmp_path):
+    log = GameEventLog(str(tmp_path))
+    log.recover()
+    board = chess.Board()
+    log.record_join('3', board)
+    log._file.write(b'\x02\x03')
+    log.close()
+
+    recovered = GameEventLog(str(tmp_path)).recover()
+    assert recovered['3'].fen() == board.fen()
+    assert os.path.getsize(tmp_path / 'events-0.log') > 0
@@ -0,0 +1,116 @@
+from api.presence import (
+    FriendGraph, PresenceTracker, build_index, changed_users, friends_snapshot, IN_GAME, OFFLINE, ONLINE
+)
+
+"""
+Tests for the in-memory friends graph and presence tracking.
+"""
+
+
+def test_load_indexes_accepted_friendships_both_ways():
+    graph = FriendGraph()
+    graph.load(build_index([(1, 2, 'accepted'), (3, 1, 'pending')]), {1: 'alice', 2: 'bob', 3: 'carol'})
+
+    assert graph.get_friends(1) == {2}
+    assert graph.get_friends(2) == {1}
+    assert graph.get_requests(1) == {3}
+    assert graph.status(1, 3) == graph.status(3, 1) == 'pending'
+    assert graph.status(2, 3) == 'none'
+
+
+def test_updates_during_reload_are_replayed_on_stale_rows():
+    graph = FriendGraph()
+    graph.load(build_index([(3, 1, 'pending')]), {})
+
+    # Rows are read, then a request is accepted, another sent and a user
+    # registered before the index built from them is swapped in
+    graph.begin_reload()
+    stale_index = build_index([(3, 1, 'pending')])
+    graph.accept(3, 1)
+    graph.add_request(4, 1)
+    graph.add_user(5, 'eve')
+    graph.load(stale_index, {3: 'carol'})
+
+    assert graph.get_friends(1) == {3}
+    assert graph.get_requests(1) == {4}
+    assert graph.usernames == {3: 'carol', 5: 'eve'}
+
+    # The journal is cleared once applied
+    graph.load(build_index([(3, 1, 'pending')]), {})
+    assert graph.get_friends(1) == set()
+
+
+def test_changed_rows_are_applied_incrementally():
+    graph = FriendGraph()
+    graph.load(build_index([(1, 2, 'accepted'), (3, 1, 'pending')]), {})
+
+    # Polled rows: a request accepted elsewhere, a new request and an unchanged row
+    graph.begin_reload()
+    rows = [(3, 1, 'accepted'), (4, 2, 'pending'), (1, 2, 'accepted')]
+    # Meanwhile user 2 declines user 4 on a socket
+    graph.remove(4, 2)
+    changed = graph.apply(rows, {4: 'dave'})
+
+    assert changed == {1, 2, 3, 4}
+    assert graph.get_friends(1) == {2, 3}
+    assert graph.get_requests(1) == set()
+    assert graph.get_requests(2) == set()
+    assert graph.usernames[4] == 'dave'
+
+    # Rows read again by an overlapping poll change nothing
+    graph.begin_reload()
+    assert graph.apply([(3, 1, 'accepted')], {}) == set()
+
+
+def test_full_reload_reports_users_with_changed_rows():
+    old = build_index([(1, 2, 'accepted'), (3, 1, 'pending'), (5, 6, 'accepted')])
+    new = build_index([(1, 2, 'accepted'), (3, 1, 'accepted'), (7, 8, 'pending')])
+    assert changed_users(old.edges, new.edges) == {1, 3, 5, 6, 7, 8}
+
+
+def test_failed_reload_stops_recording():
+    graph = FriendGraph()
+    graph.begin_reload()
+    graph.abort_reload()
+    graph.add_request(1, 2)
+    graph.load(build_index([]), {})
+    assert graph.get_requests(2) == set()
+
+
+def test_presence_follows_sockets_and_games():
+    in_game = set()
+    tracker = PresenceTracker(lambda sid: sid in in_game)
+
+    assert tracker.status(1) == OFFLINE
+    tracker.add_socket('a', 1)
+    assert tracker.status(1) == ONLINE
+    in_game.add('a')
+    assert tracker.status(1) == IN_GAME
+
+    assert tracker.remove_socket('a') == 1
+    assert tracker.status(1) == OFFLINE
+    assert tracker.online({1, 2}) == []
+
+
+def test_user_can_connect_from_several_devices():
+    tracker = PresenceTracker(lambda sid: False)
+    tracker.add_socket('phone', 1)
+    tracker.add_socket('laptop', 1)
+    assert tracker.online({1}) == [1]
+
+    tracker.remove_socket('phone')
+    assert tracker.status(1) == ONLINE
+    tracker.remove_socket('laptop')
+    assert tracker.status(1) == OFFLINE
+
+
+def test_friends_snapshot_uses_stored_usernames():
+    graph = FriendGraph()
+    graph.load(build_index([(1, 2, 'accepted'), (3, 1, 'pending')]), {2: 'bob', 3: 'carol'})
+    tracker = PresenceTracker(lambda sid: False)
+    tracker.add_socket('b', 2)
+
+    assert friends_snapshot(graph, tracker, 1) == {
+        'friends': [{'id': 2, 'username': 'bob', 'status': ONLINE}],
+        'requests': [{'id': 3, 'username': 'carol'}]
+    }
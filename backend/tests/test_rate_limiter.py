@@ -0,0 +1,229 @@
+import asyncio
+import time
+import chess
+import pytest
+from api import rate_limiter
+from api.rate_limiter import (
+    AdmissionController, RateLimiter, TokenBucket,
+    GAME_BURST, LAG_SAMPLE_INTERVAL, MAX_DB_BUSY, MAX_LOOP_LAG, SHED_ERROR, SOCKET_BURST, THROTTLE_ERROR
+)
+
+"""
+Tests for the Socket.IO rate limiting and admission control.
+"""
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    """Start every test with zeroed counters."""
+    for name in rate_limiter.counters:
+        rate_limiter.counters[name] = 0
+
+
+class FakeClock:
+    """Replaces time.monotonic so bucket refills are deterministic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock)
+    bucket = TokenBucket(rate=10.0, capacity=2)
+
+    assert bucket.consume() and bucket.consume()
+    assert not bucket.consume()
+
+    clock.now += 0.1
+    assert bucket.consume()
+    assert not bucket.consume()
+
+
+def test_abusive_socket_is_throttled_while_other_game_is_admitted(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock)
+    limiter = RateLimiter()
+
+    # The abusive client fires far beyond its burst in one instant
+    results = [limiter.allow('abuser', 'game_1') for _ in range(SOCKET_BURST * 5)]
+    assert results[:SOCKET_BURST] == [None] * SOCKET_BURST
+    assert set(results[SOCKET_BURST:]) == {'socket'}
+    assert rate_limiter.counters['throttled_socket'] == SOCKET_BURST * 4
+
+    # A well-behaved player in another game, moving once per second, is never throttled
+    for _ in range(30):
+        assert limiter.allow('player', 'game_2') is None
+        clock.now += 1.0
+    assert rate_limiter.counters['throttled_game'] == 0
+
+    # The abuser recovers its sustained rate once it slows down
+    assert limiter.allow('abuser', 'game_1') is None
+
+
+def test_game_budget_is_shared_by_all_sockets_of_a_game(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock)
+    limiter = RateLimiter()
+
+    # Each socket stays within its own burst, but together they exceed the game's
+    allowed = 0
+    for sid in ('a', 'b', 'c'):
+        for _ in range(SOCKET_BURST):
+            if limiter.allow(sid, 'game_1') is None:
+                allowed += 1
+    assert allowed == GAME_BURST
+    assert rate_limiter.counters['throttled_game'] == SOCKET_BURST * 3 - GAME_BURST
+    assert limiter.allow('d', 'game_2') is None
+
+
+def test_forgotten_socket_gets_a_fresh_budget(monkeypatch):
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', FakeClock())
+    limiter = RateLimiter()
+    for _ in range(SOCKET_BURST):
+        limiter.allow('sid')
+    assert limiter.allow('sid') == 'socket'
+
+    limiter.forget_socket('sid')
+    assert limiter.allow('sid') is None
+
+
+def test_admission_sheds_on_loop_lag():
+    admission = AdmissionController()
+    assert admission.admit()
+
+    admission.loop_lag = MAX_LOOP_LAG * 2
+    assert not admission.admit()
+    assert rate_limiter.counters == {'admitted': 1, 'shed': 1, 'throttled_socket': 0, 'throttled_game': 0}
+
+
+def test_admission_sheds_when_database_keeps_the_loop_busy():
+    admission = AdmissionController()
+    admission.db_busy = MAX_DB_BUSY + 0.1
+    assert not admission.admit()
+
+    admission.db_busy = MAX_DB_BUSY / 2
+    assert admission.admit()
+
+
+def test_monitor_measures_loop_lag_and_database_time():
+    admission = AdmissionController()
+
+    async def scenario():
+        admission.start()
+        await asyncio.sleep(LAG_SAMPLE_INTERVAL * 2)
+        assert admission.loop_lag < MAX_LOOP_LAG
+        assert admission.db_busy < MAX_DB_BUSY
+
+        # A blocking database call stalls the loop for longer than the threshold
+        with admission.db_call():
+            time.sleep(MAX_LOOP_LAG * 2)
+        await asyncio.sleep(LAG_SAMPLE_INTERVAL / 2)
+        assert admission.loop_lag > MAX_LOOP_LAG
+        assert admission.db_busy > MAX_DB_BUSY
+        assert not admission.admit()
+
+        # Once the database stops blocking, events are admitted again
+        await asyncio.sleep(LAG_SAMPLE_INTERVAL * 3)
+        assert admission.admit()
+        admission._monitor.cancel()
+
+    asyncio.run(scenario())
+
+
+# Middlegame position with plenty of legal moves
+MIDDLEGAME = 'r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP1B1PPP/R2QKB1R w KQ - 0 8'
+DB_CALL_TIME = 0.001  # seconds a stand-in database write blocks the loop
+
+
+def run_flood(limiter, duration=2.0, abusers=20, interval=0.1):
+    """
+    Drive a make_move-like handler on a running event loop: it applies
+    admission control and rate limits, generates moves on a real board and
+    writes to a blocking stand-in database. Abusive tasks call it in a tight
+    loop on one socket while a normal player sends an event every `interval`.
+
+    Returns:
+        Tuple of the player's round-trip latencies and their rejected events
+    """
+    admission = AdmissionController()
+    boards = {'game_abuse': chess.Board(MIDDLEGAME), 'game_ok': chess.Board(MIDDLEGAME)}
+
+    async def handle(sid, game_id):
+        if not admission.admit():
+            return SHED_ERROR
+        if limiter.allow(sid, game_id):
+            return THROTTLE_ERROR
+        board = boards[game_id]
+        for move in list(board.legal_moves):
+            board.push(move)
+            board.is_game_over()
+            board.pop()
+        with admission.db_call():
+            time.sleep(DB_CALL_TIME)
+        # Emitting the reply yields to the loop
+        await asyncio.sleep(0)
+        return None
+
+    async def abuse(stop):
+        while not stop.is_set():
+            # Receiving the next event from the socket yields to the loop
+            await asyncio.sleep(0)
+            await handle('abuser', 'game_abuse')
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        admission.start()
+        stop = asyncio.Event()
+        tasks = [loop.create_task(abuse(stop)) for _ in range(abusers)]
+
+        latencies, rejected = [], []
+        sent = loop.time()
+        deadline = sent + duration
+        while sent + interval < deadline:
+            sent += interval
+            await asyncio.sleep(max(0.0, sent - loop.time()))
+            # Measured from when the event was due, so loop congestion counts
+            error = await handle('player', 'game_ok')
+            latencies.append(loop.time() - sent)
+            if error:
+                rejected.append(error)
+
+        stop.set()
+        await asyncio.gather(*tasks)
+        admission._monitor.cancel()
+        return latencies, rejected
+
+    return asyncio.run(scenario())
+
+
+class UnlimitedRateLimiter(RateLimiter):
+    """Rate limiter that lets every event through."""
+
+    def allow(self, sid, game_id=None):
+        return None
+
+
+def test_well_behaved_game_latency_is_kept_under_abuse():
+    """
+    An abusive client floods a handler doing real move generation and a
+    database write while a normal game keeps playing on the same loop. The
+    abuser is throttled before reaching the database, so the normal player is
+    never rejected and its round trips stay fast.
+    """
+    latencies, rejected = run_flood(RateLimiter())
+    assert rejected == []
+    latencies.sort()
+    assert latencies[len(latencies) // 2] < 0.02
+    assert latencies[-1] < 0.1
+    assert rate_limiter.counters['throttled_socket'] > 1000
+
+
+def test_unthrottled_abuse_delays_or_sheds_the_normal_game():
+    """Without per-socket budgets the same flood hurts the normal player."""
+    latencies, rejected = run_flood(UnlimitedRateLimiter())
+    latencies.sort()
+    assert rejected or latencies[len(latencies) // 2] > 0.02
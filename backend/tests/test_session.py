@@ -0,0 +1,38 @@
+import time
+from api.session import read_session_token, sign
+
+"""
+Tests for verifying session tokens issued by login.php.
+"""
+
+SECRET = 'test-secret'
+
+
+def make_token(user_id, expires, secret=SECRET):
+    """Build a token the way php/session.php does."""
+    payload = f"{user_id}.{expires}"
+    return f"{payload}.{sign(payload, secret)}"
+
+
+def test_valid_token_names_its_user():
+    assert read_session_token(make_token(42, int(time.time()) + 60), SECRET) == 42
+
+
+def test_forged_or_tampered_tokens_are_rejected():
+    expires = int(time.time()) + 60
+    assert read_session_token(make_token(42, expires, 'other-secret'), SECRET) is None
+
+    # Claiming another user with a valid signature for the original one
+    signature = make_token(42, expires).split('.')[2]
+    assert read_session_token(f"43.{expires}.{signature}", SECRET) is None
+
+    assert read_session_token('42', SECRET) is None
+    assert read_session_token('a.b.c', SECRET) is None
+
+
+def test_expired_token_is_rejected():
+    assert read_session_token(make_token(42, int(time.time()) - 1), SECRET) is None
+
+
+def test_tokens_are_rejected_without_a_secret():
+    assert read_session_token(make_token(42, int(time.time()) + 60, ''), '') is None